@@ -1,6 +1,6 @@
 import asyncio
-import json
 import logging
+import time
 
 from aiohttp.client_exceptions import (
     ClientConnectionError,
@@ -11,22 +11,61 @@ from websockets.exceptions import ConnectionClosedError, ConnectionClosedOK
 
 from . import Channel
 from .twitchsocket import TwitchWebSocket
-from .utils import filter_campaigns, get_drops_to_claim, sort_campaigns
+from .utils import filter_campaigns, get_drops_to_claim, json_loads, sort_campaigns
 
 logger = logging.getLogger()
 
+# Channel objects for bigger responses are built in a thread executor, so the event loop
+# can switch to websocket tasks in between (work is still GIL-bound, not parallel)
+EXECUTOR_THRESHOLD = 500
+
+
+def _is_live_on_game(data, game_id):
+    # "user" has stream/broadcastSettings, category "node" has broadcaster/game
+    # we need to check broadcaster because sometimes twitch give forbidden data
+    if not (data.get("stream") or data.get("broadcaster")):
+        return False
+
+    game = (data.get("broadcastSettings") or data).get("game")
+    return bool(game) and game["id"] == game_id
+
+def _filter_channels(items, key, game_id):
+    return [Channel(data) for data in (item[key] for item in items) if _is_live_on_game(data, game_id)]
+
+async def _build_channels(items, key, game_id):
+    if len(items) < EXECUTOR_THRESHOLD:
+        return _filter_channels(items, key, game_id)
+
+    return await asyncio.get_running_loop().run_in_executor(None, _filter_channels, items, key, game_id)
+
 
 class TwitchMiner:
     logger = logging.getLogger(__name__)
 
+    __slots__ = (
+        "login", "api", "websocket", "wanted_game",
+        "inventory", "campaigns", "_target_campaigns",
+        "cache_ttl", "_campaigns_data", "_inventory_updated_at", "_campaigns_updated_at",
+        "drop_mined", "channel_id", "game_to_mine", "actual_game",
+        "_wake", "_stop_event", "_messages", "_bg_tasks", "topics", "_topic_handlers",
+    )
+
     def __init__(self, login, api, game=None):
         self.login = login
         self.api = api
+        self.websocket = None
 
         self.wanted_game = game
 
         self.inventory = None
         self.campaigns = None
+        self._target_campaigns = []
+
+        # Short-lived cache of API responses, reused when streamers are switched often
+        self.cache_ttl = 60
+        self._campaigns_data = None
+        self._inventory_updated_at = None
+        self._campaigns_updated_at = None
 
         self.drop_mined = False
 
@@ -34,33 +73,117 @@ class TwitchMiner:
         self.game_to_mine = None
         self.actual_game = None
 
-        self.topics = [f"user-drop-events.{self.login.user_id}", f"onsite-notifications.{self.login.user_id}"]
+        self._wake = asyncio.Event()
+        self._stop_event = asyncio.Event()
+        self._messages = asyncio.Queue(maxsize=256)
+        self._bg_tasks = []
 
-    async def handle_websocket(self):
+        user_id = login.user_id
+        self.topics = [f"user-drop-events.{user_id}", f"onsite-notifications.{user_id}"]
+
+        # Topic -> handler, channel topic is added/removed on streamer switch
+        self._topic_handlers = {
+            f"user-drop-events.{user_id}": self._on_drop_event,
+            f"onsite-notifications.{user_id}": self._on_notification,
+        }
+
+    async def _read_websocket(self):
         while True:
             try:
                 data = await self.websocket.receive_message()
 
             except (ConnectionClosedError, ConnectionClosedOK):
                 logger.exception("Websocket error, reconnect.")
-                await self.websocket.connect()
+                await self.websocket.reconnect()
+                continue
+
+            except Exception: # Bad frame shouldn't stop reading
+                logger.exception("Failed to read websocket message.")
+                continue
 
-            if not data or not data.get("message"):
+            if not data:
                 continue
 
-            message = json.loads(data["message"])
+            if self._messages.full():
+                # Drop the oldest message to keep up with the newest state
+                self._messages.get_nowait()
+                logger.warning("Websocket message queue is full, dropped oldest message.")
 
-            if data["topic"] == f"onsite-notifications.{self.login.user_id}":  # noqa: SIM102
-                if message["type"] == "create-notification":
-                    data = message["data"]["notification"]
-                    if data["type"] == "user_drop_reward_reminder_notification":
-                        self.drop_mined = True
+            self._messages.put_nowait(data)
 
-                    continue
+    async def handle_websocket(self):
+        while True:
+            data = await self._messages.get() # Reader only queues non-empty data
+
+            handler = self._topic_handlers.get(data.get("topic"))
+            if not handler: # Skip parsing for topics we don't handle
+                continue
+
+            message = data.get("message")
+            if not message:
+                continue
+
+            try:
+                await handler(json_loads(message))
+            except Exception:
+                logger.exception(f"Failed to handle websocket message: {data}")
+
+    async def _on_notification(self, message):
+        if message["type"] == "create-notification":
+            data = message["data"]["notification"]
+            if data["type"] == "user_drop_reward_reminder_notification":
+                self.drop_mined = True
+                self._wake.set()
+                self._inventory_updated_at = None
+
+    async def _on_drop_event(self, message):
+        if message["type"] == "drop-claim":
+            self._inventory_updated_at = None
+
+            if not self.channel_id: # Wake only idle search, watch doesn't need it
+                self._wake.set()
+
+    async def _on_broadcast_settings_update(self, message):
+        if message["type"] != "broadcast_settings_update":
+            return
 
-            if data["topic"] == f"broadcast-settings-update.{self.channel_id}":  # noqa: SIM102
-                if message["type"] == "broadcast_settings_update":
-                    self.current_game = message["game_id"]
+        game_id = str(message["game_id"]) # PubSub sends int, GQL uses str
+        if self.actual_game != game_id:
+            self.actual_game = game_id
+            self._wake.set()
+
+    async def _wait_wake(self, timeout):
+        """
+        Sleep up to timeout seconds, return earlier if websocket reports drop mined/claimed or game changed.
+        Returns True if woken before timeout.
+        """
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._wake.clear()
+
+    def _on_bg_task_done(self, task):
+        if task.cancelled():
+            return
+
+        exception = task.exception()
+        if exception:
+            self.logger.error(f"Background task {task.get_coro().__qualname__} crashed, stopping.", exc_info=exception)
+        else:
+            self.logger.error(f"Background task {task.get_coro().__qualname__} exited, stopping.")
+
+        # Miner can't work without websocket tasks
+        self.stop()
+
+    def stop(self):
+        """
+        Ask miner to stop, interrupts any pending wait.
+        """
+        self._stop_event.set()
+        self._wake.set()
 
     async def run(self):
         self.logger.info("Please don't use Twitch while mining to avoid errors")
@@ -71,17 +194,26 @@ class TwitchMiner:
 
             await self.websocket.connect()
 
-            messages_thread = asyncio.create_task(self.handle_websocket())
-
-            ping_thread = asyncio.create_task(self.websocket.run_ping())
+            self._bg_tasks = [
+                asyncio.create_task(self._read_websocket()),
+                asyncio.create_task(self.handle_websocket()),
+                asyncio.create_task(self.websocket.run_ping()),
+            ]
+            for task in self._bg_tasks:
+                task.add_done_callback(self._on_bg_task_done)
 
-            while True:
+            while not self._stop_event.is_set():
                 streamer = await self.pick_streamer()
 
+                if not streamer or self._stop_event.is_set():
+                    break
+
                 await self.websocket.listen_channel_updates(streamer.id)
 
                 self.channel_id = streamer.id
+                self._topic_handlers[f"broadcast-settings-update.{self.channel_id}"] = self._on_broadcast_settings_update
                 self.game_to_mine = streamer.game["id"]
+                self.actual_game = self.game_to_mine # Only real game change wakes watch
 
                 try:
                     await self.watch(streamer)
@@ -98,6 +230,7 @@ class TwitchMiner:
                     continue
 
                 finally:
+                    self._topic_handlers.pop(f"broadcast-settings-update.{self.channel_id}", None)
                     self.channel_id = None
                     self.game_to_mine = None
                     self.actual_game = None
@@ -109,31 +242,52 @@ class TwitchMiner:
             self.logger.exception("Critical Error")
 
         finally:
+            # Finished tasks are already reported by _on_bg_task_done
+            pending = [task for task in self._bg_tasks if not task.done()]
+            for task in pending:
+                task.remove_done_callback(self._on_bg_task_done)
+                task.cancel()
+
+            for result in await asyncio.gather(*pending, return_exceptions=True):
+                if isinstance(result, Exception): # CancelledError is BaseException
+                    self.logger.error("Background task failed while stopping", exc_info=result)
+            self._bg_tasks = []
+
             await self.websocket.close()
 
     async def watch(self, streamer):
         if not self.game_to_mine:
             raise RuntimeError("No game choosed")
 
-        while not self.drop_mined:
+        send_watch = self.api.send_watch
+        nickname = streamer.nickname
+        log_message = f"Watch sent to {nickname}"
+
+        while not self.drop_mined and not self._stop_event.is_set():
 
             if self.actual_game and self.game_to_mine != self.actual_game:
                 raise RuntimeError("Streamer changed game")
 
-            await self.api.send_watch(streamer.nickname)
-            self.logger.info(f"Watch sent to {streamer.nickname}")
-            await asyncio.sleep(15)
+            await send_watch(nickname)
+            self.logger.info(log_message)
+            await self._wait_wake(15)
 
-    async def pick_streamer(self):
-        # UPDATES
-        await self.update_inventory()
-        await self.update_campaigns()
+    async def _refresh_campaigns(self):
+        # UPDATES (independent requests, run concurrently)
+        await asyncio.gather(self.update_inventory(), self.update_campaigns())
         self.campaigns = filter_campaigns(self.inventory, self.campaigns)
         self.campaigns = sort_campaigns(self.campaigns)
+        self._target_campaigns = [
+            campaign for campaign in self.campaigns
+            if not self.wanted_game or self.wanted_game == campaign.game["displayName"]
+        ]
 
         # CLAIM DROPS
         await self.claim_all_drops()
 
+    async def pick_streamer(self):
+        await self._refresh_campaigns()
+
         # FIND STREAMER TO MINE
         while True:
             streamers = (await self.get_channel_to_mine())
@@ -142,7 +296,13 @@ class TwitchMiner:
                 break
 
             self.logger.info("No streamers to mine... We will continue in 60 seconds")
-            await asyncio.sleep(60)
+            woken = await self._wait_wake(60)
+
+            if self._stop_event.is_set():
+                return None
+
+            if woken: # Inventory changed, recheck campaigns before searching again
+                await self._refresh_campaigns()
 
         self.logger.debug(f"Streamers to mine: {[streamer.nickname for streamer in streamers]}")
 
@@ -151,10 +311,7 @@ class TwitchMiner:
     async def get_channel_to_mine(self):
         streamers = None
 
-        for campaign in self.campaigns:
-            if self.wanted_game and self.wanted_game != campaign.game["displayName"]:
-                continue
-
+        for campaign in self._target_campaigns:
             if campaign.channelsEnabled:
                 streamers = await self.get_online_channels(campaign.channels, campaign.game["id"])
 
@@ -166,7 +323,7 @@ class TwitchMiner:
             else:
                 response = await self.api.get_category_streamers(campaign.game["slug"])
 
-                streamers = [Channel(channel["node"]) for channel in response if channel["node"].get("broadcaster")] # we need to check because sometimes twitch give forbidden data
+                streamers = await _build_channels(response, "node", campaign.game["id"])
                 if streamers:
                     break
 
@@ -176,18 +333,32 @@ class TwitchMiner:
 
     async def get_online_channels(self, channels, game_id):
         response = await self.api.get_channels_information(channels)
-        response = [Channel(channel["user"]) for channel in response if channel["user"]["stream"] and channel["user"]["broadcastSettings"]["game"]]
-        return list(filter(lambda x: x.game["id"] == game_id, response))
+        return await _build_channels(response, "user", game_id)
+
+    def _is_fresh(self, updated_at):
+        return updated_at is not None and time.monotonic() - updated_at < self.cache_ttl
 
     async def update_inventory(self):
+        if self._is_fresh(self._inventory_updated_at):
+            logger.debug("Inventory cached")
+            return
+
         self.inventory = await self.api.get_inventory()
+        self._inventory_updated_at = time.monotonic()
         logger.info("Inventory fetched")
 
     async def update_campaigns(self):
+        if self._is_fresh(self._campaigns_updated_at):
+            self.campaigns = self._campaigns_data
+            logger.debug(f"Campaigns cached - {len(self.campaigns)}")
+            return
+
         response = await self.api.get_campaigns()
         campaigns_ids = [campaign["id"] for campaign in response if campaign["status"] == "ACTIVE"]
         response = await self.api.get_full_campaigns_data(campaigns_ids)
-        self.campaigns = [x["user"]["dropCampaign"] for x in response]
+        self._campaigns_data = [x["user"]["dropCampaign"] for x in response]
+        self._campaigns_updated_at = time.monotonic()
+        self.campaigns = self._campaigns_data
 
         logger.info(f"Campaigns updated - {len(self.campaigns)}")
 
@@ -195,6 +366,18 @@ class TwitchMiner:
         if not self.inventory:
             return
 
-        for drop in get_drops_to_claim(self.inventory):
-            await self.api.claim_drop(drop)
-            logger.info(f"Claimed drop {drop}")
+        drops = get_drops_to_claim(self.inventory)
+        semaphore = asyncio.Semaphore(5)  # Avoid hitting Twitch rate limits
+
+        async def claim(drop):
+            async with semaphore:
+                return await self.api.claim_drop(drop)
+
+        results = await asyncio.gather(*(claim(drop) for drop in drops), return_exceptions=True)
+
+        for drop, result in zip(drops, results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to claim drop {drop}: {result}")
+            else:
+                logger.info(f"Claimed drop {drop}")
+                self._inventory_updated_at = None
@@ -3,9 +3,10 @@ import json
 import logging
 
 import websockets
+import websockets.exceptions
 
 from .constants import WEBSOCKET
-from .utils import create_nonce
+from .utils import create_nonce, json_loads
 
 
 class TwitchWebSocket:
@@ -19,23 +20,50 @@ class TwitchWebSocket:
 
         self.current_channel_id = None
 
+        self._reconnect_lock = asyncio.Lock()
+
     async def run_ping(self):
         while True:
             if await self.is_connected():
                 await self.send_ping()
                 await asyncio.sleep(60)
             else:
-                await self.connect()
+                await self.reconnect()
 
     async def connect(self):
         await self.close()
 
         self.websocket = await websockets.connect(WEBSOCKET)
-        await self.listen_topics(self.topics)
-        await self.listen_channel_updates(self.current_channel_id)
+
+        # Don't reconnect from there, connect() can be called under reconnect lock
+        await self.listen_topics(self.topics, reconnect=False)
+        if self.current_channel_id:
+            await self.listen_topics([f"broadcast-settings-update.{self.current_channel_id}"], reconnect=False)
 
         self.logger.info("Connected to websocket")
 
+    async def reconnect(self, force=False, max_delay=60):
+        """
+        Reconnect with exponential backoff.
+        Subscribed topics and current channel are restored by connect().
+        Only one reconnect runs at a time, callers waiting for it return if it succeeded.
+        Use force to replace a connection that is still open (server RECONNECT).
+        """
+        async with self._reconnect_lock:
+            if not force and await self.is_connected():
+                return
+
+            delay = 1
+
+            while True:
+                try:
+                    await self.connect()
+                    return
+                except (OSError, asyncio.TimeoutError, websockets.exceptions.WebSocketException):
+                    self.logger.warning(f"Websocket reconnect failed, retry in {delay} seconds")
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, max_delay)
+
     async def is_connected(self):
         return self.websocket is not None and self.websocket.open
 
@@ -54,11 +82,14 @@ class TwitchWebSocket:
         if not self.current_channel_id:
             return
 
-        topic = [f"broadcast-settings-update.{self.current_channel_id}"]
-        await self.unlisten_topics(topic)
+        # Subscriptions are dropped with connection, don't wait for reconnect just to unlisten
+        if await self.is_connected():
+            topic = [f"broadcast-settings-update.{self.current_channel_id}"]
+            await self.unlisten_topics(topic)
+
         self.current_channel_id = None
 
-    async def listen_topics(self, topics):
+    async def listen_topics(self, topics, reconnect=True):
         data = {
             "data": {
                 "auth_token": self.login.access_token,
@@ -68,10 +99,10 @@ class TwitchWebSocket:
             "type":"LISTEN",
         }
 
-        await self.send_data(data)
+        await self.send_data(data, reconnect=reconnect)
         self.logger.debug(f"Listen topics: {topics}")
 
-    async def unlisten_topics(self, topics):
+    async def unlisten_topics(self, topics, reconnect=True):
         data = {
             "data": {
                 # "auth_token": self.login.access_token,
@@ -81,14 +112,26 @@ class TwitchWebSocket:
             "type":"UNLISTEN",
         }
 
-        await self.send_data(data)
+        await self.send_data(data, reconnect=reconnect)
         self.logger.debug(f"Unlisten topics: {topics}")
 
-    async def send_data(self, data):
+    async def send_data(self, data, reconnect=True):
+        """
+        Send data if connected. Otherwise reconnect (topics are resubscribed, data is dropped),
+        or raise ConnectionError right away when reconnect is False.
+        """
         if await self.is_connected():
-            await self.websocket.send(json.dumps(data))
+            try:
+                await self.websocket.send(json.dumps(data))
+                return
+            except websockets.exceptions.ConnectionClosed:
+                # Peer can drop before connection is marked as closed
+                self.logger.warning("Websocket closed while sending")
+
+        if reconnect:
+            await self.reconnect()
         else:
-            await self.connect()
+            raise ConnectionError("Websocket is not connected")
 
     async def send_ping(self):
         data = {"type":"PING"}
@@ -101,16 +144,16 @@ class TwitchWebSocket:
                 msg = await self.websocket.recv()
                 self.logger.debug(f"Received message: {msg.strip()}")
 
-                response = json.loads(msg)
+                response = json_loads(msg)
 
                 if response["type"] == "RECONNECT":
                     self.logger.warning("Websocket reconnecting...")
-                    await self.connect()
+                    await self.reconnect(force=True)
 
                 if response["type"] == "MESSAGE":
                     return response["data"]
             else:
-                await self.connect()
+                await self.reconnect()
 
             return None
 
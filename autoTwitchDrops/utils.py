@@ -4,6 +4,11 @@ from random import sample
 
 from . import Campaign, Drop
 
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
 
 def create_nonce(length=30) -> str:
     return "".join(sample(string.digits + string.ascii_letters, length))
@@ -30,9 +35,9 @@ def get_drops_to_claim(inventory):
 
     return drops_to_claim
 
-def filter_campaigns(inventory, total_campaigns):  # noqa: C901
+def filter_campaigns(inventory, total_campaigns):
     campaigns = []
-    claimed_drops_ids = []
+    claimed_drops_ids = set()
     claimed_benefits = {}
 
     if inventory.get("dropCampaignsInProgress"):
@@ -45,9 +50,7 @@ def filter_campaigns(inventory, total_campaigns):  # noqa: C901
 
             for drop in campaign["timeBasedDrops"]:
                 if drop["self"]["isClaimed"] or drop["self"]["currentMinutesWatched"] >= drop["requiredMinutesWatched"]:
-                    claimed_drops_ids.append(drop["id"])  # noqa: PERF401
-    else:
-        claimed_drops_ids = []
+                    claimed_drops_ids.add(drop["id"])
 
     if inventory.get("gameEventDrops"):
         for benefit in inventory["gameEventDrops"]:
@@ -58,8 +61,6 @@ def filter_campaigns(inventory, total_campaigns):  # noqa: C901
 
     if total_campaigns:
         for campaign in total_campaigns:
-            this_campaign_added = False
-
             if campaign["status"] == "EXPIRED":
                 continue
 
@@ -68,26 +69,16 @@ def filter_campaigns(inventory, total_campaigns):  # noqa: C901
 
             started_at = datetime.fromisoformat(campaign["startAt"])
 
-            for drop in campaign["timeBasedDrops"]:
-                add_this_drop = False
-
-                if drop["id"] in claimed_drops_ids:
-                    continue
-
-                for benefit in drop["benefitEdges"]:
-                    if claimed_benefits.get(benefit["benefit"]["id"]):
-                        if started_at > claimed_benefits[benefit["benefit"]["id"]]:
-                            add_this_drop = True
-                    else:
-                        add_this_drop = True
-
-                if add_this_drop:
-                    if not this_campaign_added:
-                        campaigns.append(Campaign(campaign))
-                        this_campaign_added = True
-
-                    campaigns[-1].drops.append(Drop(drop))
-    else:
-        campaigns = []
+            drops = [
+                Drop(drop) for drop in campaign["timeBasedDrops"]
+                if drop["id"] not in claimed_drops_ids and any(
+                    benefit["benefit"]["id"] not in claimed_benefits or started_at > claimed_benefits[benefit["benefit"]["id"]]
+                    for benefit in drop["benefitEdges"]
+                )
+            ]
+
+            if drops:
+                campaigns.append(Campaign(campaign))
+                campaigns[-1].drops = drops
 
     return campaigns
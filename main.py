@@ -1,9 +1,16 @@
 import asyncio
 import ctypes
 import logging
+import signal
+import sys
 
 import aiohttp
 
+try:
+    import uvloop # Faster event loop, not available on Windows
+except ImportError:
+    uvloop = None
+
 from autoTwitchDrops import TwitchApi, TwitchLogin, TwitchMiner, constants
 
 
@@ -29,6 +36,19 @@ def setup_logger():
     logging.getLogger("websockets").setLevel(logging.ERROR)
     logging.getLogger("autoTwitchDrops.twitch").setLevel(logging.ERROR)
 
+def setup_stop_handler(miner):
+    loop = asyncio.get_running_loop()
+
+    def handler(signum, frame):
+        # Next signal uses default behavior to force exit if graceful stop hangs
+        signal.signal(signum, signal.default_int_handler if signum == signal.SIGINT else signal.SIG_DFL)
+        loop.call_soon_threadsafe(logging.info, "Stopping... Press Ctrl+C again to force exit")
+        loop.call_soon_threadsafe(miner.stop)
+
+    # signal.signal works on Windows too, unlike loop.add_signal_handler
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, handler)
+
 async def main():
     setup_logger()
 
@@ -42,17 +62,23 @@ async def main():
         await twitch_login.login()
         logging.info(f"Successfully logged in as {twitch_login.nickname}")
 
-        ctypes.windll.kernel32.SetConsoleTitleW(twitch_login.nickname)
+        if sys.platform == "win32":
+            ctypes.windll.kernel32.SetConsoleTitleW(twitch_login.nickname)
 
         # API
         api = TwitchApi(session, twitch_login)
 
         # MINER
         miner = TwitchMiner(twitch_login, api, game=None) # Put there game in str game="Rust"
+        setup_stop_handler(miner)
+
         await miner.run()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if uvloop:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
 
 """ TODO:
 Unittests